@@ -9,35 +9,88 @@ Supports multiple AI providers: Gemini, OpenAI, Claude
 VERSION = "1.4.3"
 
 import os
+import re
 import sys
-import subprocess
+import time
 import platform
 import json
-from datetime import datetime
+import queue
+import atexit
+import threading
+from collections import deque
+from itertools import islice
 from pathlib import Path
 
-# Windows compatibility for readline
+# Faster JSON encoding/decoding when orjson is available
 try:
-    import readline
+    import orjson
 except ImportError:
-    try:
-        import pyreadline3 as readline
-    except ImportError:
-        readline = None
+    orjson = None
 
 # Detect OS
 IS_WINDOWS = platform.system() == "Windows"
 
-# Paths
+# Everything that differs between Windows and Unix is resolved here, once,
+# so the rest of natsh reads plain constants instead of branching per call
 if IS_WINDOWS:
     HOME = Path(os.environ.get("USERPROFILE", os.path.expanduser("~")))
+    VENV_PIP = Path("venv") / "Scripts" / "pip.exe"
+    BIN_NAMES = ["natsh.bat", "natsh.ps1"]
+    SHELL_INFO = "Windows CMD (cmd.exe)"
+    SHELL_RULES = """- Use Windows CMD commands (dir, del, copy, move, type, cls, start, etc.)
+- Use backslashes for paths (C:\\Users\\...)
+- Use 'dir' instead of 'ls'
+- Use 'del' or 'rmdir /s /q' instead of 'rm -r'
+- Use 'copy' instead of 'cp'
+- Use 'move' instead of 'mv'
+- Use 'type' instead of 'cat'
+- Use 'cls' instead of 'clear'
+- Use 'start' to open applications or files
+- Use '%USERPROFILE%' for home directory
+- For deleting folders use 'rmdir /s /q foldername'"""
+    _shell_commands = ["dir", "cls", "exit", "quit", "whoami", "date", "time",
+                       "type", "copy", "move", "del", "ren", "md", "rd", "tree",
+                       "find", "findstr", "sort", "more", "ver", "vol", "path",
+                       "set", "echo", "pause", "title", "color", "start", "tasklist",
+                       "ipconfig", "ping", "netstat", "systeminfo", "hostname"]
+    _shell_starters = ["cd ", "cd\\", "dir ", "echo ", "type ", "mkdir ", "md ",
+                       "del ", "rmdir ", "rd ", "copy ", "move ", "ren ", "rename ",
+                       "git ", "npm ", "node ", "npx ", "python ", "pip ", "curl ",
+                       "code ", "start ", "set ", "docker ", "kubectl ", "aws ",
+                       "powershell ", "pwsh ", "wsl ", "where ", "taskkill ",
+                       ".\\", "c:\\", "d:\\", "e:\\", "%", ">", ">>", "|", "&&"]
 else:
     HOME = Path.home()
+    VENV_PIP = Path("venv") / "bin" / "pip"
+    BIN_NAMES = ["natsh"]
+    SHELL_INFO = "bash/zsh"
+    SHELL_RULES = """- Use Unix shell commands (ls, rm, cp, mv, cat, etc.)
+- Use forward slashes for paths
+- Use '~' for home directory
+- Use 'open' on macOS or 'xdg-open' on Linux to open files"""
+    _shell_commands = ["ls", "pwd", "clear", "exit", "quit", "whoami", "date", "cal",
+                       "top", "htop", "history", "which", "man", "touch", "head", "tail",
+                       "grep", "find", "sort", "wc", "diff", "tar", "zip", "unzip"]
+    _shell_starters = ["cd ", "ls ", "echo ", "cat ", "mkdir ", "rm ", "cp ", "mv ",
+                       "git ", "npm ", "node ", "npx ", "python", "pip ", "brew ", "curl ",
+                       "wget ", "chmod ", "chown ", "sudo ", "vi ", "vim ", "nano ", "code ",
+                       "open ", "export ", "source ", "docker ", "kubectl ", "aws ", "gcloud ",
+                       "./", "/", "~", "$", ">", ">>", "|", "&&"]
 
+# Paths
 NATSH_DIR = HOME / ".natsh"
+PIP_PATH = NATSH_DIR / VENV_PIP
+BIN_PATHS = [HOME / ".local" / "bin" / name for name in BIN_NAMES]
 CONFIG_FILE = NATSH_DIR / "config.json"
-HISTORY_FILE = NATSH_DIR / "history.json"
+HISTORY_FILE = NATSH_DIR / "history.jsonl"
+LEGACY_HISTORY_FILE = NATSH_DIR / "history.json"
+READLINE_HISTORY_FILE = NATSH_DIR / "readline_history"
 ENV_FILE = NATSH_DIR / ".env"
+TRANSLATION_CACHE_FILE = NATSH_DIR / "cache.json"
+UPDATE_CACHE_FILE = NATSH_DIR / ".update_cache.json"
+
+# Use GitHub API (no cache) instead of raw.githubusercontent.com
+UPDATE_URL = "https://api.github.com/repos/pieronoviello/natsh/contents/natsh.py"
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -53,70 +106,173 @@ DEFAULT_CONFIG = {
     "dangerous_commands": ["del", "rmdir", "rd", "format", "rm", "rm -rf", "shutdown", "restart"]
 }
 
+# Common natural language words that indicate it's not a shell command
+NATURAL_INDICATORS = frozenset([
+    "to", "the", "a", "an", "my", "all", "me", "this", "that",
+    "please", "can", "could", "would", "should", "what", "how",
+    "show", "list", "create", "make", "delete", "remove", "open",
+    "go", "navigate", "switch", "change", "find", "search", "get"])
+
+# Built once so each input line costs a set lookup and a single regex match
+SHELL_COMMANDS = frozenset(cmd.lower() for cmd in _shell_commands)
+SHELL_STARTER_RE = re.compile("|".join(
+    re.escape(s) for s in sorted({s.lower() for s in _shell_starters}, key=len, reverse=True)))
+
 # Global state
 config = {}
-command_history = []
-session_history = []
+CONTEXT_HISTORY_SIZE = 5  # recent commands sent to the AI as context
+command_history = deque()
+session_history = deque(maxlen=CONTEXT_HISTORY_SIZE)
 ai_client = None
+readline = None
+
+# Working directory, refreshed by change_dir() instead of asking the OS every prompt
+current_dir = os.getcwd()
+current_dir_name = os.path.basename(current_dir) or current_dir
+
+# Config values read on every command, refreshed by load_config/save_config
+hot_config = {}
+
+# Recent AI translations, loaded from TRANSLATION_CACHE_FILE on first use
+TRANSLATION_CACHE_SIZE = 256
+TRANSLATION_CACHE_TTL = 10 * 60  # seconds
+translation_cache = None
+
+# Parsed config/.env contents, keyed by the file fingerprint they were read from
+config_cache = {"fingerprint": None, "saved": {}}
+env_cache = {"fingerprint": None, "vars": {}}
+
+# Background history writer
+HISTORY_FLUSH_DELAY = 0.25  # seconds to coalesce rapid commands into one write
+history_queue = queue.Queue()
+history_stop = threading.Event()
+history_thread = None
 
 # Ctrl+C handling is done via try/except KeyboardInterrupt in main loop
 
+# ============== JSON ==============
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+def json_loads(data):
+    """Parse JSON from bytes or str (orjson errors subclass json.JSONDecodeError)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # ============== Configuration ==============
 
+def file_fingerprint(path: Path):
+    """Identify a file's current contents by (mtime, size), or None if missing"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def write_atomic(path: Path, data: bytes, mode: int = None):
+    """Write a file via a temp file + rename so readers never see a partial file"""
+    tmp = path.with_name(path.name + ".tmp")
+    if mode is None:
+        f = open(tmp, "wb")
+    else:
+        # Create the file with its final permissions so the data is never
+        # more readable than mode; chmod too in case a stale tmp file existed
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        os.chmod(tmp, mode)
+        f = os.fdopen(fd, "wb")
+    with f:
+        f.write(data)
+    os.replace(tmp, path)
+
 def load_config():
     """Load configuration from file"""
     global config
-    if CONFIG_FILE.exists():
+    fingerprint = file_fingerprint(CONFIG_FILE)
+    saved_config = {}
+    # Only re-parse the file when it changed since we last read or wrote it
+    if fingerprint is not None and fingerprint == config_cache["fingerprint"]:
+        saved_config = config_cache["saved"]
+    elif fingerprint is not None:
         try:
-            with open(CONFIG_FILE) as f:
-                saved_config = json.load(f)
-                # Deep merge for nested dicts
-                config = DEFAULT_CONFIG.copy()
-                for key, value in saved_config.items():
-                    if key in config and isinstance(config[key], dict) and isinstance(value, dict):
-                        config[key] = {**config[key], **value}
-                    else:
-                        config[key] = value
+            saved_config = json_loads(CONFIG_FILE.read_bytes())
+            config_cache["saved"] = saved_config
+            config_cache["fingerprint"] = fingerprint
         except (json.JSONDecodeError, IOError):
-            config = DEFAULT_CONFIG.copy()
-    else:
-        config = DEFAULT_CONFIG.copy()
+            saved_config = {}
+    # Deep merge for nested dicts
+    config = DEFAULT_CONFIG.copy()
+    for key, value in saved_config.items():
+        if key in config and isinstance(config[key], dict) and isinstance(value, dict):
+            config[key] = {**config[key], **value}
+        else:
+            config[key] = value
+    refresh_hot_config()
     return config
 
 def save_config():
     """Save configuration to file"""
     NATSH_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+    data = json_dumps(config, indent=True)
+    with open(CONFIG_FILE, "wb") as f:
+        f.write(data)
+    config_cache["saved"] = json_loads(data)
+    config_cache["fingerprint"] = file_fingerprint(CONFIG_FILE)
+    refresh_hot_config()
+
+def refresh_hot_config():
+    """Precompute the config values read on every command"""
+    provider = config.get("provider", "gemini")
+    hot_config["provider"] = provider
+    hot_config["model"] = config.get("model", {}).get(provider, "")
+    hot_config["aliases"] = config.get("aliases", {})
+    hot_config["safe_mode"] = bool(config.get("safe_mode", True))
+    # One pattern matching any dangerous command at the start or after whitespace
+    # or a shell separator (; & | or a subshell). An entry ending in a word character
+    # must end at a non-word character (so "del/q" matches but "formatter" doesn't);
+    # entries like "rm -rf /" or "mkfs." stay plain prefixes, as before
+    dangerous = config.get("dangerous_commands", DEFAULT_CONFIG["dangerous_commands"])
+    hot_config["dangerous_re"] = re.compile(
+        r"(?:^|[\s;&|(])(?:" + "|".join(
+            re.escape(d.lower()) + (r"(?!\w)" if re.match(r"\w", d[-1:]) else "")
+            for d in dangerous
+        ) + ")"
+    ) if dangerous else None
+
+def read_env() -> dict:
+    """Parse the .env file, reusing the last parse if the file is unchanged"""
+    fingerprint = file_fingerprint(ENV_FILE)
+    if fingerprint != env_cache["fingerprint"]:
+        env_vars = {}
+        if fingerprint is not None:
+            with open(ENV_FILE) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#") and "=" in line:
+                        key, value = line.split("=", 1)
+                        env_vars[key] = value
+        env_cache["vars"] = env_vars
+        env_cache["fingerprint"] = fingerprint
+    return env_cache["vars"]
 
 def load_env():
     """Load environment variables from .env file"""
-    if ENV_FILE.exists():
-        with open(ENV_FILE) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key] = value
+    os.environ.update(read_env())
 
 def save_env_key(key: str, value: str):
     """Save or update a key in .env file"""
     NATSH_DIR.mkdir(parents=True, exist_ok=True)
-    env_vars = {}
-
-    if ENV_FILE.exists():
-        with open(ENV_FILE) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    k, v = line.split("=", 1)
-                    env_vars[k] = v
-
+    env_vars = read_env()
     env_vars[key] = value
 
-    with open(ENV_FILE, "w") as f:
-        for k, v in env_vars.items():
-            f.write(f"{k}={v}\n")
+    # Single write, owner-only permissions (API keys), swapped in atomically
+    data = "".join(f"{k}={v}\n" for k, v in env_vars.items())
+    write_atomic(ENV_FILE, data.encode("utf-8"), mode=0o600)
+    env_cache["fingerprint"] = file_fingerprint(ENV_FILE)
 
     os.environ[key] = value
 
@@ -125,41 +281,120 @@ def save_env_key(key: str, value: str):
 def load_history():
     """Load command history from file"""
     global command_history
+    max_hist = config.get("max_history", 100)
+    if not HISTORY_FILE.exists() and LEGACY_HISTORY_FILE.exists():
+        migrate_history()
+    # Keep only last max_history entries; older ones fall off as new ones arrive
+    command_history = deque(maxlen=max_hist)
     if HISTORY_FILE.exists():
         try:
-            with open(HISTORY_FILE) as f:
-                command_history = json.load(f)
-                # Keep only last max_history entries
-                max_hist = config.get("max_history", 100)
-                command_history = command_history[-max_hist:]
-        except (json.JSONDecodeError, IOError):
-            command_history = []
+            total = 0
+            with open(HISTORY_FILE, "rb") as f:
+                for line in f:
+                    # Skip torn or corrupt lines: bad JSON, a split UTF-8
+                    # character (both ValueError), or anything but an entry dict
+                    try:
+                        entry = json_loads(line)
+                    except ValueError:
+                        continue
+                    if not isinstance(entry, dict):
+                        continue
+                    command_history.append(entry)
+                    total += 1
+            # Compact the log once it grows well past max_history
+            if total > 2 * max_hist:
+                write_atomic(HISTORY_FILE, format_history_lines(command_history))
+        except IOError:
+            command_history.clear()
     return command_history
 
-def save_history():
-    """Save command history to file"""
+def migrate_history():
+    """Convert the old history.json array into history.jsonl"""
+    try:
+        entries = json_loads(LEGACY_HISTORY_FILE.read_bytes())
+        if not isinstance(entries, list):
+            return
+        write_atomic(HISTORY_FILE, format_history_lines(e for e in entries if isinstance(e, dict)))
+        LEGACY_HISTORY_FILE.unlink()
+    except (ValueError, IOError):
+        pass
+
+def format_history_lines(entries) -> bytes:
+    """Serialize history entries as JSON Lines"""
+    return b"".join(json_dumps(entry) + b"\n" for entry in entries)
+
+def append_history(entries: list):
+    """Append entries to the history log"""
     NATSH_DIR.mkdir(parents=True, exist_ok=True)
-    max_hist = config.get("max_history", 100)
-    with open(HISTORY_FILE, "w") as f:
-        json.dump(command_history[-max_hist:], f, indent=2)
+    with open(HISTORY_FILE, "ab", buffering=8192) as f:
+        f.write(format_history_lines(entries))
+
+def drain_history_queue() -> tuple:
+    """Take everything queued so far, returning (entries, stop_requested)"""
+    entries = []
+    stop = False
+    while True:
+        try:
+            entry = history_queue.get_nowait()
+        except queue.Empty:
+            return entries, stop
+        if entry is None:
+            stop = True
+        else:
+            entries.append(entry)
+
+def history_worker():
+    """Persist history in the background, coalescing bursts into one write"""
+    while True:
+        entry = history_queue.get()
+        if entry is None:
+            return
+        # Give rapid-fire commands a moment to pile up, unless we're shutting down
+        history_stop.wait(HISTORY_FLUSH_DELAY)
+        entries, stop = drain_history_queue()
+        try:
+            append_history([entry] + entries)
+        except OSError:
+            pass
+        if stop:
+            return
+
+def start_history_writer():
+    """Start the background history writer thread"""
+    global history_thread
+    history_thread = threading.Thread(target=history_worker, daemon=True)
+    history_thread.start()
+    atexit.register(commit_history)
+
+def commit_history():
+    """Flush pending history to disk and stop the writer thread"""
+    if history_thread is not None and history_thread.is_alive():
+        history_stop.set()
+        history_queue.put(None)
+        history_thread.join(timeout=2)
+    else:
+        entries, _ = drain_history_queue()
+        if entries:
+            append_history(entries)
 
 def add_to_history(user_input: str, command: str, output: str = "", executed: bool = True):
     """Add command to history"""
+    from datetime import datetime
     entry = {
         "timestamp": datetime.now().isoformat(),
         "input": user_input,
         "command": command,
         "output": output[:500] if output else "",
         "executed": executed,
-        "cwd": os.getcwd()
+        "cwd": current_dir
     }
     command_history.append(entry)
     session_history.append(entry)
-    save_history()
+    history_queue.put(entry)
 
 def show_history(count: int = 20):
     """Display command history"""
-    entries = command_history[-count:]
+    entries = list(islice(command_history, max(0, len(command_history) - count), None))
     if not entries:
         print("\033[90mNo history yet.\033[0m")
         return
@@ -174,7 +409,10 @@ def show_history(count: int = 20):
 
 def format_context_history() -> str:
     """Format recent history for AI context"""
-    entries = session_history[-5:] if session_history else command_history[-5:]
+    if session_history:
+        entries = session_history
+    else:
+        entries = list(islice(command_history, max(0, len(command_history) - CONTEXT_HISTORY_SIZE), None))
     if not entries:
         return "No previous commands."
 
@@ -226,14 +464,10 @@ def install_package(package: str) -> bool:
     """Install a pip package"""
     print(f"\033[33m[..] Installing {package}...\033[0m", end="", flush=True)
     try:
+        import subprocess
         # Use the venv's pip
-        if IS_WINDOWS:
-            pip_path = NATSH_DIR / "venv" / "Scripts" / "pip.exe"
-        else:
-            pip_path = NATSH_DIR / "venv" / "bin" / "pip"
-
         result = subprocess.run(
-            [str(pip_path), "install", "-q", package],
+            [str(PIP_PATH), "install", "-q", package],
             capture_output=True,
             text=True
         )
@@ -259,13 +493,48 @@ def ensure_provider_installed(provider: str) -> bool:
 # ============== AI Providers ==============
 
 class AIProvider:
-    """Base class for AI providers"""
+    """Base class for AI providers
+
+    Each provider builds its SDK client once and keeps it for the session, so
+    the client's HTTP connection pool is reused across requests instead of
+    paying a new TCP + TLS handshake on every translation. The OpenAI and
+    Anthropic SDKs retry transient failures themselves; Gemini's doesn't, so
+    GeminiProvider wraps its requests in call_with_retry.
+    """
+    max_attempts = 3
+    retry_delay = 1.0  # seconds, doubled after each failed attempt
+
     def __init__(self, api_key: str):
         self.api_key = api_key
 
-    def get_command(self, prompt: str) -> str:
+    def get_command(self, prompt: str, max_tokens: int = 200) -> str:
         raise NotImplementedError
 
+    def stream(self, prompt: str):
+        """Yield the response text in chunks as it is generated"""
+        yield self.get_command(prompt)
+
+    def call_with_retry(self, request):
+        """Run request(), backing off and retrying on transient failures"""
+        for attempt in range(self.max_attempts):
+            try:
+                return request()
+            except Exception as e:
+                if not self.is_retryable(e) or attempt == self.max_attempts - 1:
+                    raise
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Connection problems, timeouts, 408/409, rate limits and server errors"""
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        # httpx (used by the SDKs) raises TransportError subclasses for resets and timeouts
+        if any(cls.__name__ in ("TransportError", "APIConnectionError") for cls in type(error).__mro__):
+            return True
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        return isinstance(status, int) and (status in (408, 409, 429) or status >= 500)
+
 class GeminiProvider(AIProvider):
     """Google Gemini provider"""
     def __init__(self, api_key: str):
@@ -274,13 +543,31 @@ class GeminiProvider(AIProvider):
         self.client = genai.Client(api_key=api_key)
         self.model = config.get("model", {}).get("gemini", "gemini-2.5-flash")
 
-    def get_command(self, prompt: str) -> str:
-        response = self.client.models.generate_content(
+    def get_command(self, prompt: str, max_tokens: int = 200) -> str:
+        response = self.call_with_retry(lambda: self.client.models.generate_content(
             model=self.model,
             contents=prompt
-        )
+        ))
         return response.text.strip()
 
+    def stream(self, prompt: str):
+        def start():
+            # The stream is lazy: request errors only surface when the first chunk is read
+            chunks = iter(self.client.models.generate_content_stream(
+                model=self.model,
+                contents=prompt
+            ))
+            return next(chunks, None), chunks
+
+        first, chunks = self.call_with_retry(start)
+        if first is None:
+            return
+        if first.text:
+            yield first.text
+        for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+
 class OpenAIProvider(AIProvider):
     """OpenAI provider"""
     def __init__(self, api_key: str):
@@ -289,14 +576,25 @@ class OpenAIProvider(AIProvider):
         self.client = OpenAI(api_key=api_key)
         self.model = config.get("model", {}).get("openai", "gpt-4o-mini")
 
-    def get_command(self, prompt: str) -> str:
+    def get_command(self, prompt: str, max_tokens: int = 200) -> str:
         response = self.client.chat.completions.create(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
-            max_tokens=200
+            max_tokens=max_tokens
         )
         return response.choices[0].message.content.strip()
 
+    def stream(self, prompt: str):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=200,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
 class ClaudeProvider(AIProvider):
     """Anthropic Claude provider"""
     def __init__(self, api_key: str):
@@ -305,14 +603,25 @@ class ClaudeProvider(AIProvider):
         self.client = Anthropic(api_key=api_key)
         self.model = config.get("model", {}).get("claude", "claude-3-haiku-20240307")
 
-    def get_command(self, prompt: str) -> str:
+    def get_command(self, prompt: str, max_tokens: int = 200) -> str:
         response = self.client.messages.create(
             model=self.model,
-            max_tokens=200,
+            max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}]
         )
         return response.content[0].text.strip()
 
+    def stream(self, prompt: str):
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=200,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        for event in response:
+            if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+
 def get_provider_key_name(provider: str) -> str:
     """Get environment variable name for provider API key"""
     return {
@@ -334,7 +643,7 @@ def init_ai_client(provider: str = None) -> AIProvider:
     global ai_client
 
     if provider is None:
-        provider = config.get("provider", "gemini")
+        provider = hot_config["provider"]
 
     # Ensure provider package is installed
     if not ensure_provider_installed(provider):
@@ -364,13 +673,13 @@ def init_ai_client(provider: str = None) -> AIProvider:
 def setup_api_key(provider: str = None):
     """Prompt user to enter API key"""
     if provider is None:
-        provider = config.get("provider", "gemini")
+        provider = hot_config["provider"]
 
     key_name = get_provider_key_name(provider)
     url = get_provider_url(provider)
 
     print(f"\n\033[36mGet your {provider.upper()} API key at: {url}\033[0m\n")
-    api_key = input(f"\033[33mEnter your {provider.upper()} API key:\033[0m ").strip()
+    api_key = input_unrecorded(f"\033[33mEnter your {provider.upper()} API key:\033[0m ").strip()
 
     if not api_key:
         print("No API key provided.")
@@ -382,43 +691,45 @@ def setup_api_key(provider: str = None):
 
 # ============== Command Translation ==============
 
-def build_prompt(user_input: str, cwd: str) -> str:
-    """Build prompt for AI"""
-    history_context = format_context_history()
+# The OS-specific parts of the prompt never change during a session,
+# so only cwd, history and the request are filled in per call
+PROMPT_TEMPLATE = f"""Convert this request to a {SHELL_INFO} command.
 
-    if IS_WINDOWS:
-        shell_info = "Windows CMD (cmd.exe)"
-        shell_rules = """- Use Windows CMD commands (dir, del, copy, move, type, cls, start, etc.)
-- Use backslashes for paths (C:\\Users\\...)
-- Use 'dir' instead of 'ls'
-- Use 'del' or 'rmdir /s /q' instead of 'rm -r'
-- Use 'copy' instead of 'cp'
-- Use 'move' instead of 'mv'
-- Use 'type' instead of 'cat'
-- Use 'cls' instead of 'clear'
-- Use 'start' to open applications or files
-- Use '%USERPROFILE%' for home directory
-- For deleting folders use 'rmdir /s /q foldername'"""
-    else:
-        shell_info = "bash/zsh"
-        shell_rules = """- Use Unix shell commands (ls, rm, cp, mv, cat, etc.)
-- Use forward slashes for paths
-- Use '~' for home directory
-- Use 'open' on macOS or 'xdg-open' on Linux to open files"""
+Directory: {{cwd}}
+History:
+{{history}}
 
-    return f"""Convert this request to a {shell_info} command.
+Rules:
+{SHELL_RULES}
 
-Directory: {cwd}
+RESPOND WITH ONLY THIS JSON FORMAT, NOTHING ELSE:
+{{{{"cmd": "your command here"}}}}
+
+Request: {{user_input}}"""
+
+BATCH_PROMPT_TEMPLATE = f"""Convert each numbered request to a {SHELL_INFO} command.
+
+Directory: {{cwd}}
 History:
-{history_context}
+{{history}}
 
 Rules:
-{shell_rules}
+{SHELL_RULES}
 
-RESPOND WITH ONLY THIS JSON FORMAT, NOTHING ELSE:
-{{"cmd": "your command here"}}
+RESPOND WITH ONLY THIS JSON FORMAT, ONE COMMAND PER REQUEST IN THE SAME ORDER, NOTHING ELSE:
+{{{{"cmds": ["first command", "second command"]}}}}
 
-Request: {user_input}"""
+Requests:
+{{requests}}"""
+
+def build_prompt(user_input: str, cwd: str) -> str:
+    """Build prompt for AI"""
+    return PROMPT_TEMPLATE.format(cwd=cwd, history=format_context_history(), user_input=user_input)
+
+def build_batch_prompt(user_inputs: list, cwd: str) -> str:
+    """Build prompt for translating several requests in one AI call"""
+    requests = "\n".join(f"{i}. {text}" for i, text in enumerate(user_inputs, 1))
+    return BATCH_PROMPT_TEMPLATE.format(cwd=cwd, history=format_context_history(), requests=requests)
 
 def build_explain_prompt(command: str) -> str:
     """Build prompt to explain a command"""
@@ -430,8 +741,6 @@ Explain what it does and any important flags/options."""
 
 def clean_command(response: str) -> str:
     """Clean up AI response to extract just the command using JSON parsing"""
-    import re
-
     if not response:
         return response
 
@@ -494,22 +803,145 @@ def clean_command(response: str) -> str:
 
     return response
 
+def translation_key(user_input: str, cwd: str) -> str:
+    """Cache key for a translation: everything the prompt depends on
+
+    The history context is part of the prompt ("delete it", "run that again"),
+    so it is part of the key too, hashed to keep cache.json small.
+    """
+    import hashlib
+    request = " ".join(user_input.lower().split())
+    history = hashlib.sha256(format_context_history().encode("utf-8")).hexdigest()[:16]
+    return "\x1f".join((hot_config["provider"], ai_client.model, cwd, history, request))
+
+def load_translation_cache() -> dict:
+    """Load cached translations from disk on first use"""
+    global translation_cache
+    if translation_cache is None:
+        try:
+            translation_cache = json_loads(TRANSLATION_CACHE_FILE.read_bytes())
+        except (json.JSONDecodeError, IOError):
+            translation_cache = {}
+    return translation_cache
+
+def save_translation_cache():
+    """Save cached translations to disk"""
+    try:
+        write_atomic(TRANSLATION_CACHE_FILE, json_dumps(translation_cache))
+    except OSError:
+        pass
+
+def forget_translation(user_input: str, cwd: str):
+    """Drop a translation the user rejected so it isn't suggested again"""
+    if ai_client is not None and load_translation_cache().pop(translation_key(user_input, cwd), None):
+        save_translation_cache()
+
+def cached_translation(user_input: str, cwd: str) -> str:
+    """Return a cached translation that hasn't expired, or None"""
+    cache = load_translation_cache()
+    key = translation_key(user_input, cwd)
+    hit = cache.pop(key, None)
+    if hit and time.time() - hit["time"] < TRANSLATION_CACHE_TTL:
+        cache[key] = hit  # Re-insert so the most recently used entries are last
+        return hit["cmd"]
+    return None
+
+def remember_translation(user_input: str, cwd: str, command: str):
+    """Add a translation to the cache (call save_translation_cache to persist)"""
+    cache = load_translation_cache()
+    cache[translation_key(user_input, cwd)] = {"cmd": command, "time": time.time()}
+    # Evict least recently used entries
+    while len(cache) > TRANSLATION_CACHE_SIZE:
+        del cache[next(iter(cache))]
+
 def get_command(user_input: str, cwd: str) -> str:
     """Use AI to translate natural language to shell command"""
     if ai_client is None:
         return None
 
+    command = cached_translation(user_input, cwd)
+    if command:
+        return command
+
     prompt = build_prompt(user_input, cwd)
     response = ai_client.get_command(prompt)
-    return clean_command(response)
+    command = clean_command(response)
+    if command:
+        remember_translation(user_input, cwd, command)
+        save_translation_cache()
+    return command
+
+def clean_commands(response: str, count: int) -> tuple:
+    """Extract the commands from a batch response as (commands, from_json)
+
+    commands is None unless there is exactly one command per request.
+    from_json is False when they came from the numbered-list fallback.
+    """
+    if not response:
+        return None, False
+
+    response = response.strip()
+    match = re.search(r'```(?:json)?\s*(.*?)\s*```', response, re.DOTALL)
+    if match:
+        response = match.group(1).strip()
+
+    # Expected: {"cmds": [...]}
+    start = response.find("{")
+    end = response.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json_loads(response[start:end+1])
+            if isinstance(data, dict) and isinstance(data.get("cmds"), list):
+                commands = data["cmds"]
+                # A null or non-string item isn't a command; let the caller retry one by one
+                if len(commands) != count or not all(isinstance(cmd, str) for cmd in commands):
+                    return None, False
+                return [cmd.strip() for cmd in commands], True
+        except json.JSONDecodeError:
+            pass
+
+    # Fallback: a numbered list ("1. ls"), numbered 1..count in order.
+    # Unnumbered lines (preamble, notes) are ignored rather than taken as commands
+    numbered = [re.match(r'(\d+)[.)]\s*(.+)', line.strip()) for line in response.split("\n")]
+    numbered = [m for m in numbered if m]
+    if [int(m.group(1)) for m in numbered] != list(range(1, count + 1)):
+        return None, False
+    return [m.group(2).strip() for m in numbered], False
 
-def explain_command(command: str) -> str:
-    """Use AI to explain a command"""
+def get_commands(user_inputs: list, cwd: str) -> list:
+    """Translate several requests with a single AI call"""
     if ai_client is None:
-        return "AI not initialized"
+        return None
+
+    commands = [cached_translation(text, cwd) for text in user_inputs]
+    pending = [i for i, command in enumerate(commands) if not command]
+    if len(pending) == 1:
+        commands[pending[0]] = get_command(user_inputs[pending[0]], cwd)
+    elif pending:
+        prompt = build_batch_prompt([user_inputs[i] for i in pending], cwd)
+        response = ai_client.get_command(prompt, max_tokens=200 * len(pending))
+        translated, from_json = clean_commands(response, len(pending))
+        if translated is None:
+            # The response didn't line up with the requests; go one at a time
+            # (get_command caches each result itself)
+            translated = [get_command(user_inputs[i], cwd) for i in pending]
+        for i, command in zip(pending, translated):
+            commands[i] = command
+            # Only cache answers whose pairing with the requests is unambiguous
+            if command and from_json:
+                remember_translation(user_inputs[i], cwd, command)
+        if from_json:
+            save_translation_cache()
+    return commands
+
+def explain_command(command: str):
+    """Use AI to explain a command, yielding the explanation as it streams in"""
+    if ai_client is None:
+        yield "AI not initialized"
+        return
 
     prompt = build_explain_prompt(command)
-    return ai_client.get_command(prompt)
+    yield from ai_client.stream(prompt)
 
 # ============== Command Detection ==============
 
@@ -519,63 +951,30 @@ def is_natural_language(text: str) -> bool:
         return False
 
     text_lower = text.lower().strip()
-    words = text_lower.split()
-
-    # Common natural language words that indicate it's not a shell command
-    natural_indicators = ["to", "the", "a", "an", "my", "all", "me", "this", "that",
-                          "please", "can", "could", "would", "should", "what", "how",
-                          "show", "list", "create", "make", "delete", "remove", "open",
-                          "go", "navigate", "switch", "change", "find", "search", "get"]
+    # Only the second word matters, so stop splitting after it
+    words = text_lower.split(None, 2)
 
     # If second word is a natural language indicator, it's likely natural language
-    if len(words) >= 2 and words[1] in natural_indicators:
+    if len(words) >= 2 and words[1] in NATURAL_INDICATORS:
         return True
 
-    if IS_WINDOWS:
-        shell_commands = ["dir", "cls", "exit", "quit", "whoami", "date", "time",
-                          "type", "copy", "move", "del", "ren", "md", "rd", "tree",
-                          "find", "findstr", "sort", "more", "ver", "vol", "path",
-                          "set", "echo", "pause", "title", "color", "start", "tasklist",
-                          "ipconfig", "ping", "netstat", "systeminfo", "hostname"]
-        shell_starters = ["cd ", "cd\\", "dir ", "echo ", "type ", "mkdir ", "md ",
-                          "del ", "rmdir ", "rd ", "copy ", "move ", "ren ", "rename ",
-                          "git ", "npm ", "node ", "npx ", "python ", "pip ", "curl ",
-                          "code ", "start ", "set ", "docker ", "kubectl ", "aws ",
-                          "powershell ", "pwsh ", "wsl ", "where ", "taskkill ",
-                          ".\\", "c:\\", "d:\\", "e:\\", "%", ">", ">>", "|", "&&"]
-    else:
-        shell_commands = ["ls", "pwd", "clear", "exit", "quit", "whoami", "date", "cal",
-                          "top", "htop", "history", "which", "man", "touch", "head", "tail",
-                          "grep", "find", "sort", "wc", "diff", "tar", "zip", "unzip"]
-        shell_starters = ["cd ", "ls ", "echo ", "cat ", "mkdir ", "rm ", "cp ", "mv ",
-                          "git ", "npm ", "node ", "npx ", "python", "pip ", "brew ", "curl ",
-                          "wget ", "chmod ", "chown ", "sudo ", "vi ", "vim ", "nano ", "code ",
-                          "open ", "export ", "source ", "docker ", "kubectl ", "aws ", "gcloud ",
-                          "./", "/", "~", "$", ">", ">>", "|", "&&"]
-
-    if text_lower in [cmd.lower() for cmd in shell_commands]:
+    if text_lower in SHELL_COMMANDS:
         return False
-    return not any(text_lower.startswith(s.lower()) for s in shell_starters)
+    return SHELL_STARTER_RE.match(text_lower) is None
 
 def is_dangerous_command(command: str) -> bool:
     """Check if command is potentially dangerous"""
-    if not config.get("safe_mode", True):
+    if not hot_config["safe_mode"] or hot_config["dangerous_re"] is None:
         return False
 
-    dangerous = config.get("dangerous_commands", DEFAULT_CONFIG["dangerous_commands"])
-    cmd_lower = command.lower().strip()
-
-    for d in dangerous:
-        if cmd_lower.startswith(d.lower()) or f" {d.lower()}" in cmd_lower:
-            return True
-    return False
+    return hot_config["dangerous_re"].search(command.lower().strip()) is not None
 
 # ============== Help & UI ==============
 
 def show_help():
     """Display available commands"""
-    provider = config.get("provider", "gemini")
-    model = config.get("model", {}).get(provider, "default")
+    provider = hot_config["provider"]
+    model = hot_config["model"] or "default"
     print(f"""
 \033[1mnatsh\033[0m - Natural Shell
 \033[90mProvider: {provider.upper()} | Model: {model}\033[0m
@@ -589,6 +988,7 @@ def show_help():
   !config            Show current configuration
   !alias <name>=<cmd> Create alias
   !aliases           List all aliases
+  !batch             Translate several requests in one AI call
   !update            Update to latest version
   !uninstall         Remove natsh
 
@@ -613,8 +1013,8 @@ def show_config():
 
 def show_welcome():
     """Display welcome message"""
-    provider = config.get("provider", "gemini")
-    model = config.get("model", {}).get(provider, "default")
+    provider = hot_config["provider"]
+    model = hot_config["model"] or "default"
     print()
     print(f"\033[1mnatsh\033[0m v{VERSION} - Natural Shell")
     print(f"\033[90mProvider: {provider.upper()} | Model: {model} | Type !help for commands\033[0m")
@@ -644,29 +1044,171 @@ def show_aliases():
 
 def resolve_alias(text: str) -> str:
     """Resolve alias if exists"""
-    aliases = config.get("aliases", {})
-    parts = text.split()
-    if parts and parts[0] in aliases:
-        args = " ".join(parts[1:])
-        return aliases[parts[0]] + (" " + args if args else "")
-    return text
+    parts = text.split(None, 1)
+    command = hot_config["aliases"].get(parts[0]) if parts else None
+    if command is None:
+        return text
+    args = parts[1].strip() if len(parts) > 1 else ""
+    return command + (" " + args if args else "")
 
 # ============== Command Execution ==============
 
-def run_command(command: str) -> tuple:
-    """Execute a shell command and return stdout, stderr"""
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    return result.stdout, result.stderr
+if IS_WINDOWS:
+    def expand_path(path: str) -> str:
+        """Expand %VARS% and ~ in a cd target"""
+        return os.path.expanduser(os.path.expandvars(path))
+else:
+    def expand_path(path: str) -> str:
+        """Expand ~ in a cd target"""
+        return os.path.expanduser(path)
+
+def change_dir(path: str):
+    """Change the working directory and update the cached prompt folder"""
+    global current_dir, current_dir_name
+    os.chdir(path)
+    current_dir = os.getcwd()
+    current_dir_name = os.path.basename(current_dir) or current_dir
+
+def run_command(command: str) -> str:
+    """Execute a shell command, streaming its output, and return the tail for history"""
+    import subprocess
+    # Output is printed as it arrives; only the last lines are kept in memory
+    tail = deque(maxlen=20)
+    with subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          text=True, errors="replace", bufsize=1) as process:
+        try:
+            for line in process.stdout:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+                tail.append(line)
+            process.wait()
+        except KeyboardInterrupt:
+            process.kill()
+            process.wait()
+            raise
+    return "".join(tail)[-500:]
+
+def confirm_and_run(user_input: str, command: str, cwd: str):
+    """Ask the user to confirm an AI-generated command, then execute it"""
+    # Check for dangerous command
+    if is_dangerous_command(command):
+        confirm = input_unrecorded(f"\033[31m[!] {command}\033[0m \033[33m(dangerous) [y/N]\033[0m ")
+        if confirm.lower() != "y":
+            forget_translation(user_input, cwd)
+            add_to_history(user_input, command, "", executed=False)
+            return
+    else:
+        confirm = input_unrecorded(f"\033[33m-> {command}\033[0m [Enter/n] ")
+        if confirm.lower() in ["n", "no"]:
+            forget_translation(user_input, cwd)
+            add_to_history(user_input, command, "", executed=False)
+            return
+
+    # Execute command
+    if command.lower().startswith("cd "):
+        path = expand_path(command[3:].strip())
+        try:
+            change_dir(path)
+            add_to_history(user_input, command, f"Changed to {path}")
+        except Exception as e:
+            print(f"cd: {e}")
+    else:
+        output = run_command(command)
+        add_to_history(user_input, command, output)
 
 def get_install_paths():
     """Get installation paths based on OS"""
-    if IS_WINDOWS:
-        install_dir = HOME / ".natsh"
-        bin_paths = [HOME / ".local" / "bin" / "natsh.bat", HOME / ".local" / "bin" / "natsh.ps1"]
-    else:
-        install_dir = HOME / ".natsh"
-        bin_paths = [HOME / ".local" / "bin" / "natsh"]
-    return install_dir, bin_paths
+    return NATSH_DIR, BIN_PATHS
+
+def setup_readline():
+    """Enable line editing for interactive sessions"""
+    global readline
+    # Windows compatibility for readline
+    try:
+        import readline
+    except ImportError:
+        try:
+            import pyreadline3 as readline
+        except ImportError:
+            readline = None
+            return
+
+    # Let readline own the up-arrow history and persist it natively
+    readline.set_history_length(config.get("max_history", 100))
+    try:
+        readline.read_history_file(str(READLINE_HISTORY_FILE))
+    except OSError:
+        pass  # First run, no history file yet
+    atexit.register(save_readline_history)
+
+def input_unrecorded(prompt: str) -> str:
+    """input() that keeps the answer out of readline history (API keys, y/n replies)"""
+    answer = input(prompt)
+    if readline is not None and answer:
+        length = readline.get_current_history_length()
+        if length and readline.get_history_item(length) == answer:
+            if hasattr(readline, "remove_history_item"):
+                readline.remove_history_item(length - 1)
+            else:
+                # pyreadline3 has no remove_history_item; rebuild without the last entry
+                kept = [readline.get_history_item(i) for i in range(1, length)]
+                readline.clear_history()
+                for item in kept:
+                    readline.add_history(item)
+    return answer
+
+def save_readline_history():
+    """Write the up-arrow history back to disk"""
+    # The install directory is gone after !uninstall
+    if NATSH_DIR.exists():
+        try:
+            readline.write_history_file(str(READLINE_HISTORY_FILE))
+        except OSError:
+            pass
+
+# ============== Updates ==============
+
+def fetch_remote_version(use_cache: bool = True) -> tuple:
+    """Fetch the latest natsh.py from GitHub and return (version, content)
+
+    Sends the ETag from the previous check, so when the remote file hasn't
+    changed GitHub answers 304 with no body. In that case content is None
+    and version comes from the previous check.
+    """
+    import urllib.request
+    import urllib.error
+    import base64
+
+    try:
+        cache = json_loads(UPDATE_CACHE_FILE.read_bytes())
+    except (json.JSONDecodeError, IOError):
+        cache = {}
+
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if use_cache and cache.get("etag") and cache.get("version"):
+        headers["If-None-Match"] = cache["etag"]
+    req = urllib.request.Request(UPDATE_URL, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as response:
+            etag = response.headers.get("ETag")
+            data = json_loads(response.read())
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return cache["version"], None
+        raise
+
+    # Decode base64 content
+    remote_content = base64.b64decode(data['content']).decode('utf-8')
+    # Extract version from remote file
+    match = re.search(r'VERSION\s*=\s*["\']([^"\']+)["\']', remote_content)
+    remote_version = match.group(1) if match else None
+    if etag and remote_version:
+        write_atomic(UPDATE_CACHE_FILE, json_dumps({
+            "etag": etag,
+            "sha": data.get("sha"),
+            "version": remote_version
+        }))
+    return remote_version, remote_content
 
 # ============== Main Loop ==============
 
@@ -677,10 +1219,13 @@ def main():
     NATSH_DIR.mkdir(parents=True, exist_ok=True)
     load_env()
     config = load_config()
+    if sys.stdin.isatty():
+        setup_readline()
     load_history()
+    start_history_writer()
 
     # Check for API key
-    provider = config.get("provider", "gemini")
+    provider = hot_config["provider"]
     key_name = get_provider_key_name(provider)
 
     if not os.environ.get(key_name):
@@ -698,9 +1243,8 @@ def main():
     # Main loop
     while True:
         try:
-            cwd = os.getcwd()
-            folder_name = os.path.basename(cwd) or cwd
-            prompt = f"\033[32m{folder_name}\033[0m > "
+            cwd = current_dir
+            prompt = f"\033[32m{current_dir_name}\033[0m > "
             user_input = input(prompt).strip()
 
             if not user_input:
@@ -708,17 +1252,14 @@ def main():
 
             # === Handle CD command ===
             if user_input.lower().startswith("cd "):
-                path = user_input[3:].strip()
-                if IS_WINDOWS:
-                    path = os.path.expandvars(path)
-                path = os.path.expanduser(path)
+                path = expand_path(user_input[3:].strip())
                 try:
-                    os.chdir(path)
+                    change_dir(path)
                 except Exception as e:
                     print(f"cd: {e}")
                 continue
             elif user_input.lower() == "cd":
-                os.chdir(str(HOME))
+                change_dir(str(HOME))
                 continue
 
             # === Exit commands ===
@@ -733,7 +1274,7 @@ def main():
 
             if user_input.startswith("!api"):
                 parts = user_input.split()
-                prov = parts[1] if len(parts) > 1 else config.get("provider", "gemini")
+                prov = parts[1] if len(parts) > 1 else hot_config["provider"]
                 if prov not in ["gemini", "openai", "claude"]:
                     print("\033[31mInvalid provider. Use: gemini, openai, claude\033[0m")
                     continue
@@ -744,7 +1285,7 @@ def main():
             if user_input.startswith("!provider"):
                 parts = user_input.split()
                 if len(parts) < 2:
-                    print(f"\033[90mCurrent provider: {config.get('provider', 'gemini')}\033[0m")
+                    print(f"\033[90mCurrent provider: {hot_config['provider']}\033[0m")
                     print("Available: gemini, openai, claude")
                     continue
                 prov = parts[1].lower()
@@ -764,8 +1305,8 @@ def main():
 
             if user_input.startswith("!model"):
                 parts = user_input.split(maxsplit=1)
-                prov = config.get("provider", "gemini")
-                current_model = config.get("model", {}).get(prov, "")
+                prov = hot_config["provider"]
+                current_model = hot_config["model"]
                 default_model = DEFAULT_CONFIG["model"].get(prov, "")
                 if len(parts) < 2:
                     print(f"\033[90mCurrent model ({prov}): {current_model}\033[0m")
@@ -817,28 +1358,42 @@ def main():
                 show_aliases()
                 continue
 
+            if user_input == "!batch":
+                if ai_client is None:
+                    print("\033[31mAI not initialized. Run !api to set up.\033[0m")
+                    continue
+                print("\033[90mEnter one request per line, empty line to finish:\033[0m")
+                requests = []
+                while True:
+                    line = input("\033[90m...\033[0m ").strip()
+                    if not line:
+                        break
+                    requests.append(line)
+                if not requests:
+                    continue
+                print("\033[90m[..] thinking...\033[0m", end="", flush=True)
+                commands = get_commands(requests, cwd)
+                print("\r\033[K", end="")  # Clear the thinking message
+                for request, command in zip(requests, commands):
+                    if not command:
+                        print(f"\033[31mCould not generate command for: {request}\033[0m")
+                        continue
+                    confirm_and_run(request, command, cwd)
+                continue
+
             if user_input == "!update":
                 print("\033[33m[..] Checking for updates...\033[0m")
                 try:
-                    import urllib.request
-                    import re
-                    import base64
-                    # Use GitHub API (no cache) instead of raw.githubusercontent.com
-                    api_url = "https://api.github.com/repos/pieronoviello/natsh/contents/natsh.py"
-                    req = urllib.request.Request(api_url, headers={"Accept": "application/vnd.github.v3+json"})
-                    with urllib.request.urlopen(req) as response:
-                        data = json.loads(response.read().decode('utf-8'))
-                    # Decode base64 content
-                    remote_content = base64.b64decode(data['content']).decode('utf-8')
-                    # Extract version from remote file
-                    match = re.search(r'VERSION\s*=\s*["\']([^"\']+)["\']', remote_content)
-                    if not match:
+                    remote_version, remote_content = fetch_remote_version()
+                    if not remote_version:
                         print("\033[31m[X] Could not determine remote version\033[0m")
                         continue
-                    remote_version = match.group(1)
                     if remote_version == VERSION:
                         print(f"\033[32m[OK] Already up to date (v{VERSION})\033[0m")
                         continue
+                    if remote_content is None:
+                        # Remote unchanged since the last check, but we still need its contents
+                        remote_version, remote_content = fetch_remote_version(use_cache=False)
                     # New version available - save it
                     print(f"\033[33m[..] Updating v{VERSION} -> v{remote_version}...\033[0m")
                     local_path = NATSH_DIR / "natsh.py"
@@ -851,12 +1406,13 @@ def main():
                 continue
 
             if user_input == "!uninstall":
-                confirm = input("\033[33mRemove natsh? [y/N]\033[0m ")
+                confirm = input_unrecorded("\033[33mRemove natsh? [y/N]\033[0m ")
                 if confirm.lower() == "y":
                     install_dir, bin_paths = get_install_paths()
                     if IS_WINDOWS:
                         # On Windows, create a batch script that runs after we exit
                         import tempfile
+                        import subprocess
                         batch_content = f'''@echo off
 timeout /t 2 /nobreak >nul
 rmdir /s /q "{install_dir}"
@@ -873,6 +1429,8 @@ del "%~f0"
                         sys.exit(0)
                     else:
                         import shutil
+                        # Flush history now so the exit handler has nothing left to write
+                        commit_history()
                         if install_dir.exists():
                             shutil.rmtree(install_dir)
                         for bin_path in bin_paths:
@@ -886,9 +1444,10 @@ del "%~f0"
             if user_input.startswith("?"):
                 cmd_to_explain = user_input[1:].strip()
                 if cmd_to_explain:
-                    print(f"\033[90mExplaining: {cmd_to_explain}\033[0m")
-                    explanation = explain_command(cmd_to_explain)
-                    print(f"\n{explanation}\n")
+                    print(f"\033[90mExplaining: {cmd_to_explain}\033[0m\n")
+                    for chunk in explain_command(cmd_to_explain):
+                        print(chunk, end="", flush=True)
+                    print("\n")
                 continue
 
             # === Direct command execution ===
@@ -896,11 +1455,8 @@ del "%~f0"
                 cmd = user_input[1:]
                 if not cmd:
                     continue
-                stdout, stderr = run_command(cmd)
-                print(stdout, end="")
-                if stderr:
-                    print(stderr, end="")
-                add_to_history(user_input, cmd, stdout + stderr)
+                output = run_command(cmd)
+                add_to_history(user_input, cmd, output)
                 continue
 
             # === Check for alias ===
@@ -908,11 +1464,8 @@ del "%~f0"
 
             # === Direct shell command ===
             if not is_natural_language(user_input):
-                stdout, stderr = run_command(user_input)
-                print(stdout, end="")
-                if stderr:
-                    print(stderr, end="")
-                add_to_history(user_input, user_input, stdout + stderr)
+                output = run_command(user_input)
+                add_to_history(user_input, user_input, output)
                 continue
 
             # === AI Translation ===
@@ -928,37 +1481,7 @@ del "%~f0"
                 print("\033[31mCould not generate command.\033[0m")
                 continue
 
-            # Check for dangerous command
-            if is_dangerous_command(command):
-                confirm = input(f"\033[31m[!] {command}\033[0m \033[33m(dangerous) [y/N]\033[0m ")
-                if confirm.lower() != "y":
-                    add_to_history(user_input, command, "", executed=False)
-                    continue
-            else:
-                confirm = input(f"\033[33m-> {command}\033[0m [Enter/n] ")
-                if confirm.lower() in ["n", "no"]:
-                    add_to_history(user_input, command, "", executed=False)
-                    continue
-
-            # Execute command
-            if command.lower().startswith("cd "):
-                path = command[3:].strip()
-                if IS_WINDOWS:
-                    path = os.path.expandvars(path)
-                path = os.path.expanduser(path)
-                try:
-                    os.chdir(path)
-                    add_to_history(user_input, command, f"Changed to {path}")
-                except Exception as e:
-                    print(f"cd: {e}")
-            else:
-                print("\033[90m[..] running...\033[0m", end="", flush=True)
-                stdout, stderr = run_command(command)
-                print("\r\033[K", end="")  # Clear the running message
-                print(stdout, end="")
-                if stderr:
-                    print(stderr, end="")
-                add_to_history(user_input, command, stdout + stderr)
+            confirm_and_run(user_input, command, cwd)
 
         except EOFError:
             print("\n\033[90mGoodbye!\033[0m")